@@ -0,0 +1,353 @@
+from bisect import bisect_right
+from itertools import accumulate, groupby
+
+EPSILON = 1e-9
+
+
+class FenwickTree:
+    """Binary indexed tree over days for point updates and prefix sums"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+
+    def add(self, day: int, amount: float):
+        if day < 0:
+            raise ValueError(f"Invalid day {day}")
+        if day >= self.size:
+            self.grow(max(day + 1, 2 * self.size))
+        i = day + 1
+        while i <= self.size:
+            self.tree[i] += amount
+            i += i & -i
+
+    def grow(self, size: int):
+        """Resize to cover days [0, size), keeping the existing values"""
+        if size <= self.size:
+            return
+        values = [self.range(day, day + 1) for day in range(self.size)]
+        self.size = size
+        self.tree = [0.0] * (size + 1)
+        # linear time build, each node pushes its sum to its parent
+        for day, value in enumerate(values):
+            self.tree[day + 1] = value
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self.tree[parent] += self.tree[i]
+
+    def prefix(self, day: int) -> float:
+        """Sum over days [0, day)"""
+        total = 0.0
+        i = min(day, self.size)
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range(self, start: int, end: int) -> float:
+        """Sum over days [start, end)"""
+        return self.prefix(end) - self.prefix(start)
+
+
+class ResourceCalendar:
+    """
+        Capacity of a single resource node 'r'.
+        By default each bucket capacity is the total for the bucket, which
+        runs from its start until the start of the next bucket, the last
+        bucket is open ended. Any load booked inside a bucket consumes its
+        capacity, so windows are widened to whole buckets.
+        With per_day the capacity is instead a daily rate over the bucket.
+        Days before the first bucket have no capacity.
+    """
+
+    def __init__(self, buckets: list, per_day: bool = False):
+        self.per_day = per_day
+        self.starts = [b["start"] for b in buckets]
+        self.capacities = [b["capacity"] for b in buckets]
+        if per_day:
+            spans = [(nxt - cur) * rate for cur, nxt, rate in zip(self.starts, self.starts[1:], self.capacities)]
+        else:
+            spans = self.capacities
+        # cumulative capacity at the start of each bucket
+        self.cumulative = [0.0] + list(accumulate(spans))
+
+    def bucket(self, day: int) -> int:
+        """Index of the bucket holding day, -1 before the first bucket"""
+        return bisect_right(self.starts, day) - 1
+
+    def window(self, start: int, end: int) -> tuple[int, int | None]:
+        """
+            The days whose load competes for capacity in [start, end).
+            Widened to bucket boundaries for bucket totals, None for an open end.
+        """
+        if self.per_day or start >= end:
+            return start, end
+        first = self.bucket(start)
+        last = self.bucket(end - 1)
+        lo = self.starts[first] if first >= 0 else 0
+        if last + 1 < len(self.starts):
+            return lo, self.starts[last + 1]
+        return lo, None
+
+    def _cumulative_at(self, day: int) -> float:
+        """Total capacity over days [0, day), only meaningful for per day rates"""
+        i = self.bucket(day)
+        if i < 0:
+            return 0.0
+        return self.cumulative[i] + (day - self.starts[i]) * self.capacities[i]
+
+    def capacity(self, start: int, end: int) -> float:
+        """Total capacity over days [start, end)"""
+        if start >= end:
+            return 0.0
+        if self.per_day:
+            return self._cumulative_at(end) - self._cumulative_at(start)
+        first = max(self.bucket(start), 0)
+        last = self.bucket(end - 1)
+        if last < 0:
+            return 0.0
+        return self.cumulative[last + 1] - self.cumulative[first]
+
+
+class CapacityLedger:
+    """
+        Tracks capacity and consumption for the resource nodes of a problem.
+        Capacity comes from bucket prefix sums and consumption is kept in a
+        Fenwick tree per resource so reservations, releases and availability
+        queries over a window of days are all O(log n).
+        horizon only sizes the trees up front, they grow when a reservation
+        lands past it. per_day is passed on to each ResourceCalendar.
+    """
+
+    def __init__(self, problem: dict, horizon: int | None = None, per_day: bool = False):
+        nodes = {n["id"]: n for n in problem.get("nodes", [])}
+        if horizon is None:
+            horizon = default_horizon(problem)
+        self.horizon = horizon
+        self.calendars = {}
+        self.consumed = {}
+        for node in nodes.values():
+            if node["nodeType"] == "r":
+                self.calendars[node["id"]] = ResourceCalendar(node["buckets"], per_day)
+                self.consumed[node["id"]] = FenwickTree(horizon)
+
+        # operation id -> list of (edge id, priority groups of (resource id, quantityPer, split weight))
+        self.loads = {}
+        for edge in problem.get("edges", []):
+            if edge["edgeType"] != "l":
+                continue
+            target = nodes.get(edge["to"])
+            if target is None:
+                raise ValueError(f"Load edge {edge['id']} points to unknown node {edge['to']}")
+            qty_per = edge.get("quantityPer", 1)
+            if target["nodeType"] == "r":
+                groups = [[(target["id"], qty_per, 1.0)]]
+            elif target["nodeType"] == "ar":
+                groups = alternate_groups(target["alternates"], qty_per)
+                for alternate in target["alternates"]:
+                    if alternate["id"] not in self.calendars:
+                        raise ValueError(f"Load edge {edge['id']} alternate {alternate['id']} must be a resource")
+            else:
+                raise ValueError(f"Load edge {edge['id']} must point to a resource, got '{target['nodeType']}'")
+            self.loads.setdefault(edge["from"], []).append((edge["id"], groups))
+        # plan loads fixed to one resource before alternates, so an 'ar' does not
+        # take a shared resource that a direct load needs while its alternates are free
+        for loads in self.loads.values():
+            loads.sort(key=lambda load: len(load[1]) > 1 or len(load[1][0]) > 1)
+
+    def _check(self, resource: int, start: int, end: int):
+        if resource not in self.calendars:
+            raise KeyError(f"Unknown resource {resource}")
+        if not 0 <= start <= end:
+            raise ValueError(f"Invalid window [{start}, {end})")
+
+    def capacity(self, resource: int, start: int, end: int) -> float:
+        self._check(resource, start, end)
+        return self.calendars[resource].capacity(start, end)
+
+    def used(self, resource: int, start: int, end: int) -> float:
+        """Capacity consumed by load competing with [start, end)"""
+        self._check(resource, start, end)
+        lo, hi = self.calendars[resource].window(start, end)
+        tree = self.consumed[resource]
+        return tree.range(lo, tree.size if hi is None else hi)
+
+    def available(self, resource: int, start: int, end: int | None = None) -> float:
+        """Capacity left on a resource over days [start, end), a single day if end is omitted"""
+        if end is None:
+            end = start + 1
+        return self.capacity(resource, start, end) - self.used(resource, start, end)
+
+    def extend(self, horizon: int):
+        """Grow every resource up front to cover days [0, horizon)"""
+        self.horizon = max(self.horizon, horizon)
+        for tree in self.consumed.values():
+            tree.grow(horizon)
+
+    def reserve(self, resource: int, day: int, amount: float):
+        self._check(resource, day, day + 1)
+        if amount < 0:
+            raise ValueError(f"Cannot reserve a negative amount {amount}, use release")
+        self.consumed[resource].add(day, amount)
+        self.horizon = max(self.horizon, self.consumed[resource].size)
+
+    def booked(self, resource: int, day: int) -> float:
+        """Capacity reserved on exactly this day"""
+        self._check(resource, day, day + 1)
+        return self.consumed[resource].range(day, day + 1)
+
+    def _check_release(self, resource: int, day: int, amount: float):
+        if amount < 0:
+            raise ValueError(f"Cannot release a negative amount {amount}")
+        booked = self.booked(resource, day)
+        if amount > booked + EPSILON:
+            raise ValueError(f"Cannot release {amount} from resource {resource} on day {day}, only {booked} is booked")
+
+    def release(self, resource: int, day: int, amount: float):
+        self._check_release(resource, day, amount)
+        self.consumed[resource].add(day, -amount)
+
+    def move(self, resource: int, amount: float, old_day: int, new_day: int):
+        """Shift a reservation when the planned order that made it moves"""
+        # validate everything up front so a bad move leaves the ledger untouched
+        self._check_release(resource, old_day, amount)
+        self._check(resource, new_day, new_day + 1)
+        self.release(resource, old_day, amount)
+        self.reserve(resource, new_day, amount)
+
+    def allocate(self, operation: int, qty: float, day: int):
+        """
+            Reserve capacity for qty units of an operation on a day.
+            Alternate resources are tried in priority order and the quantity
+            is split by splitPercentage among alternates of the same priority,
+            with any share one alternate cannot take spread over its siblings
+            before falling through to the next priority. Loads fixed to one
+            resource are planned before loads through alternate resources.
+            Returns {load edge id: {resource id: qty}} with the units of the
+            operation loaded through each edge, and the qty that could not be
+            loaded on every edge.
+        """
+        loads = self.loads.get(operation, [])
+        plans, carried = self._plan(loads, qty, day)
+        resources = [r for _, groups in loads for r in {r for group in groups for r, _, _ in group}]
+        if carried < qty - EPSILON and len(resources) > len(set(resources)):
+            # direct loads sharing a resource split it exactly
+            target = min(float(qty), self._direct_limit(loads, day))
+            plans, carried = self._plan(loads, target, day)
+            if carried < target - EPSILON:
+                # alternates competing with other loads, bisect for the
+                # largest qty the greedy plan can carry on every load
+                lo, hi = carried, target
+                for _ in range(50):
+                    mid = (lo + hi) / 2
+                    if self._plan(loads, mid, day)[1] >= mid - EPSILON:
+                        lo = mid
+                    else:
+                        hi = mid
+                # drop the bisection noise when the rounded qty still fits
+                snapped = round(lo, 6)
+                if self._plan(loads, snapped, day)[1] >= snapped - EPSILON:
+                    lo = snapped
+                plans, carried = self._plan(loads, lo, day)
+
+        # trim every load down to the qty all loads can carry
+        for plan in plans:
+            excess = sum(plan.values()) - carried
+            for resource in reversed(list(plan)):
+                if excess <= 0:
+                    break
+                cut = min(excess, plan[resource])
+                plan[resource] -= cut
+                excess -= cut
+
+        allocations = {}
+        for (edge_id, groups), plan in zip(loads, plans):
+            qty_pers = {r: q for group in groups for r, q, _ in group}
+            loaded = {}
+            for resource, units in plan.items():
+                if units > 0:
+                    self.reserve(resource, day, units * qty_pers[resource])
+                    loaded[resource] = units
+            allocations[edge_id] = loaded
+        return allocations, max(0.0, qty - carried)
+
+    def _direct_limit(self, loads: list, day: int) -> float:
+        """Largest qty the loads fixed to a single resource can carry together"""
+        per_unit = {}
+        for _, groups in loads:
+            if len(groups) == 1 and len(groups[0]) == 1:
+                resource, qty_per, _ = groups[0][0]
+                per_unit[resource] = per_unit.get(resource, 0.0) + qty_per
+        limits = [max(0.0, self.available(r, day)) / q for r, q in per_unit.items() if q > 0]
+        return min(limits, default=float("inf"))
+
+    def _plan(self, loads: list, qty: float, day: int):
+        """Tentative per load plans for qty units and the qty all loads can carry"""
+        # capacity taken by earlier loads, so two loads on the same resource
+        # do not both see its full availability
+        pending = {}
+        plans = []
+        carried = float(qty)
+        for _, groups in loads:
+            plan = {}
+            left = float(qty)
+            for group in groups:
+                left = self._fill(group, left, day, pending, plan)
+                if left <= 0:
+                    break
+            plans.append(plan)
+            # an operation is limited by its most constrained load
+            carried = min(carried, qty - left)
+        return plans, carried
+
+    def _fill(self, group: list, qty: float, day: int, pending: dict, plan: dict) -> float:
+        """Spread qty over one priority group by split weight, returns what is left over"""
+        left = qty
+        active = group
+        while left > EPSILON and active:
+            total = sum(weight for _, _, weight in active)
+            placed = 0.0
+            still_free = []
+            for resource, qty_per, weight in active:
+                share = left * weight / total
+                free = self.available(resource, day) - pending.get(resource, 0.0)
+                fits = free / qty_per if qty_per > 0 else float("inf")
+                take = max(0.0, min(share, fits))
+                if take > 0:
+                    plan[resource] = plan.get(resource, 0.0) + take
+                    pending[resource] = pending.get(resource, 0.0) + take * qty_per
+                    placed += take
+                if fits > take:
+                    still_free.append((resource, qty_per, weight))
+            if placed <= 0:
+                break
+            left -= placed
+            active = still_free
+        return left if left > EPSILON else 0.0
+
+
+def alternate_groups(alternates: list, qty_per: float) -> list:
+    """Group alternate resources by priority, splitting evenly when no splitPercentage is given"""
+    ordered = sorted(alternates, key=lambda a: a["priority"])
+    groups = []
+    for _, members in groupby(ordered, key=lambda a: a["priority"]):
+        members = list(members)
+        default = 100.0 / len(members)
+        splits = [m.get("splitPercentage", default) for m in members]
+        # percentages only need to be positive, normalize them within the group
+        total = sum(splits)
+        groups.append([(m["id"], qty_per, split / total) for m, split in zip(members, splits)])
+    return groups
+
+
+def default_horizon(problem: dict) -> int:
+    """Initial horizon, the last demand or bucket date plus the total lead time"""
+    dates = [d["date"] for d in problem.get("demands", [])]
+    lead = 0
+    for node in problem.get("nodes", []):
+        if node["nodeType"] == "r":
+            dates.extend(b["start"] for b in node["buckets"])
+        elif node["nodeType"] == "o":
+            lead += node.get("leadTime", 0)
+    return max(dates, default=0) + lead + 1
@@ -0,0 +1,188 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+AGENT_DIR = Path(__file__).resolve().parent.parent / "green-agent"
+
+# green-agent is not an importable package name, load the module from its path
+spec = importlib.util.spec_from_file_location("capacity", AGENT_DIR / "capacity.py")
+capacity = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(capacity)
+
+
+def load_task(name: str) -> dict:
+    with open(AGENT_DIR / "data" / "tasks" / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def alternate_problem(alternates: list, capacities: dict, extra_edges: list = ()) -> dict:
+    """Operation 1 loading an 'ar' node 2 over single bucket resources"""
+    nodes = [{"id": 1, "nodeType": "o", "leadTime": 1}, {"id": 2, "nodeType": "ar", "alternates": alternates}]
+    nodes += [{"id": r, "nodeType": "r", "buckets": [{"start": 0, "capacity": c}]} for r, c in capacities.items()]
+    edges = [{"id": 5, "from": 1, "to": 2, "edgeType": "l", "quantityPer": 1}, *extra_edges]
+    return {"nodes": nodes, "edges": edges, "demands": []}
+
+
+BUCKETS = [{"start": 2, "capacity": 5}, {"start": 5, "capacity": 10}, {"start": 9, "capacity": 1}]
+
+
+def test_calendar_bucket_totals():
+    calendar = capacity.ResourceCalendar(BUCKETS)
+    assert calendar.capacity(0, 2) == 0.0
+    assert calendar.capacity(2, 3) == 5.0
+    assert calendar.capacity(3, 6) == 15.0
+    assert calendar.capacity(0, 100) == 16.0
+    assert calendar.window(3, 6) == (2, 9)
+    assert calendar.window(6, 12) == (5, None)
+
+
+def test_calendar_per_day_rates():
+    calendar = capacity.ResourceCalendar(BUCKETS, per_day=True)
+    assert calendar.capacity(0, 2) == 0.0
+    assert calendar.capacity(2, 5) == 15.0
+    assert calendar.capacity(4, 7) == 25.0
+    assert calendar.capacity(0, 12) == 58.0
+
+
+def test_fenwick_grow_keeps_values():
+    tree = capacity.FenwickTree(4)
+    for day in range(4):
+        tree.add(day, day + 1)
+    tree.add(10, 7)
+    assert tree.size >= 11
+    assert tree.range(0, 4) == 10.0
+    assert tree.range(1, 3) == 5.0
+    assert tree.range(4, tree.size) == 7.0
+
+
+def test_reserve_release_move():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"), per_day=True)
+    ledger.reserve(100, 3, 5)
+    assert ledger.used(100, 0, 10) == 5.0
+    assert ledger.available(100, 3) == 15.0
+    ledger.move(100, 5, 3, 7)
+    assert ledger.used(100, 3, 4) == 0.0
+    assert ledger.used(100, 7, 8) == 5.0
+    ledger.release(100, 7, 5)
+    assert ledger.used(100, 0, ledger.horizon) == 0.0
+
+
+def test_move_to_invalid_day_keeps_reservation():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"))
+    ledger.reserve(100, 0, 5)
+    with pytest.raises(ValueError):
+        ledger.move(100, 5, 0, -1)
+    assert ledger.used(100, 0, ledger.horizon) == 5.0
+
+
+def test_reserve_past_horizon_grows():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"))
+    late = ledger.horizon + 100
+    ledger.reserve(101, late, 30)
+    assert ledger.horizon > late
+    assert ledger.available(101, late) == 70.0
+    ledger.move(101, 30, late, 0)
+    assert ledger.used(101, 0, 1) == 30.0
+
+
+def test_bucket_capacity_matches_task_2():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"))
+    assert ledger.capacity(100, 10, 15) == 20.0
+    ledger.reserve(100, 10, 20)
+    assert ledger.available(100, 12) == 0.0
+
+
+def test_allocate_task_2_matches_solution():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"))
+    solution = load_task("2-s.json")
+    allocations, unloaded = ledger.allocate(10, 50, 10)
+    assert allocations == {503: {100: 20.0, 101: 30.0}}
+    assert unloaded == 0.0
+
+    expected = {}
+    for order in solution["plannedOrders"]:
+        for resource in (100, 101):
+            if resource in order["selectedAlternates"]:
+                expected[resource] = expected.get(resource, 0) + order["qty"]
+    assert allocations[503] == expected
+
+
+def test_allocate_normalizes_split_percentages():
+    ledger = capacity.CapacityLedger(alternate_problem(
+        [{"id": 10, "priority": 1, "splitPercentage": 30}, {"id": 11, "priority": 1, "splitPercentage": 30}],
+        {10: 100, 11: 100},
+    ))
+    allocations, unloaded = ledger.allocate(1, 10, 0)
+    assert allocations == {5: {10: 5.0, 11: 5.0}}
+    assert unloaded == 0.0
+
+
+def test_allocate_fills_same_priority_before_next():
+    ledger = capacity.CapacityLedger(alternate_problem(
+        [{"id": 10, "priority": 1}, {"id": 11, "priority": 1}, {"id": 12, "priority": 2}],
+        {10: 5, 11: 100, 12: 100},
+    ))
+    allocations, _ = ledger.allocate(1, 20, 0)
+    assert allocations == {5: {10: 5.0, 11: 15.0}}
+
+
+def test_allocate_shared_resource_not_over_reserved():
+    ledger = capacity.CapacityLedger(alternate_problem(
+        [{"id": 3, "priority": 1}, {"id": 4, "priority": 2}],
+        {3: 10, 4: 0},
+        [{"id": 6, "from": 1, "to": 3, "edgeType": "l", "quantityPer": 1}],
+    ))
+    allocations, unloaded = ledger.allocate(1, 10, 0)
+    assert allocations == {5: {3: 5.0}, 6: {3: 5.0}}
+    assert unloaded == 5.0
+    assert ledger.available(3, 0) == 0.0
+
+
+def test_fenwick_rejects_negative_day():
+    with pytest.raises(ValueError):
+        capacity.FenwickTree(4).add(-1, 1)
+
+
+def test_alternate_must_be_a_resource():
+    problem = alternate_problem([{"id": 10, "priority": 1}, {"id": 99, "priority": 2}], {10: 5})
+    with pytest.raises(ValueError):
+        capacity.CapacityLedger(problem)
+
+
+def test_release_more_than_booked_is_rejected():
+    ledger = capacity.CapacityLedger(load_task("2-p.json"))
+    ledger.reserve(100, 2, 5)
+    with pytest.raises(ValueError):
+        ledger.release(100, 2, 100)
+    with pytest.raises(ValueError):
+        ledger.move(100, 6, 2, 4)
+    with pytest.raises(ValueError):
+        ledger.release(100, 3, 1)
+    assert ledger.booked(100, 2) == 5.0
+    assert ledger.available(100, 2) == 15.0
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_allocate_direct_load_before_alternates(reverse):
+    problem = alternate_problem(
+        [{"id": 3, "priority": 1}, {"id": 4, "priority": 2}],
+        {3: 10, 4: 100},
+        [{"id": 6, "from": 1, "to": 3, "edgeType": "l", "quantityPer": 1}],
+    )
+    if reverse:
+        problem["edges"].reverse()
+    ledger = capacity.CapacityLedger(problem)
+    allocations, unloaded = ledger.allocate(1, 10, 0)
+    assert allocations == {5: {4: 10.0}, 6: {3: 10.0}}
+    assert unloaded == 0.0
+
+
+def test_allocate_direct_loads_split_shared_resource():
+    nodes = [{"id": 1, "nodeType": "o", "leadTime": 1}, {"id": 3, "nodeType": "r", "buckets": [{"start": 0, "capacity": 10}]}]
+    edges = [{"id": e, "from": 1, "to": 3, "edgeType": "l", "quantityPer": 1} for e in (5, 6)]
+    ledger = capacity.CapacityLedger({"nodes": nodes, "edges": edges, "demands": []})
+    allocations, unloaded = ledger.allocate(1, 10, 0)
+    assert allocations == {5: {3: 5.0}, 6: {3: 5.0}}
+    assert unloaded == 5.0